@@ -0,0 +1,28 @@
+import pandas as pd
+
+# One-shot conversion of the cleaned dataset to Parquet, so the dashboard
+# reads typed, compressed columns instead of re-parsing the CSV.
+# Run from the project root: python scripts/convert_to_parquet.py
+
+CSV_PATH = "cleaned_dataset.csv"
+PARQUET_PATH = "cleaned_dataset.parquet"
+
+CATEGORY_COLUMNS = [
+    "Service",
+    "Departure station",
+    "Arrival station",
+    "Route",
+    "Season",
+    "Delay_Category",
+]
+
+print(f"Loading {CSV_PATH}...")
+df = pd.read_csv(
+    CSV_PATH,
+    engine="pyarrow",
+    dtype={col: "category" for col in CATEGORY_COLUMNS},
+)
+df["Date"] = pd.to_datetime(df["Date"], errors="coerce").astype("datetime64[ns]")
+
+df.to_parquet(PARQUET_PATH, compression="snappy", index=False)
+print(f"Saved {len(df)} rows x {len(df.columns)} columns to {PARQUET_PATH}")
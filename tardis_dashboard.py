@@ -1,8 +1,19 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import os
 import pickle
-from datetime import datetime
+import warnings
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import duckdb
+import pyarrow.parquet as pq
 import plotly.express as px
+import plotly.graph_objects as go
+from plotly_resampler import FigureResampler
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
 # Set page configuration
 st.set_page_config(
@@ -68,14 +79,92 @@ st.markdown("*Predicting the Unpredictable: SNCF Train Delay Analysis & Forecast
 st.markdown("---")
 
 
+DATA_PATH = "cleaned_dataset.csv"
+# Written by scripts/convert_to_parquet.py, preferred over the CSV when present
+PARQUET_PATH = "cleaned_dataset.parquet"
+
+# Full-history tables written by scripts/build_aggregates.py
+AGGREGATES_DIR = "aggregates"
+AGGREGATE_TABLES = (
+    "monthly_avg",
+    "delay_causes",
+    "station_dep_top",
+    "station_arr_top",
+    "route_top",
+)
+
+# Columns read from the cleaned dataset: everything the pages display plus the
+# features the prediction model falls back on
+USED_COLS = (
+    "Date",
+    "Service",
+    "Departure station",
+    "Arrival station",
+    "Route",
+    "Season",
+    "Year",
+    "Month",
+    "Delay_Category",
+    "Total_Delay_Score",
+    "Average journey time",
+    "Number of scheduled trains",
+    "Number of cancelled trains",
+    "Number of trains delayed at departure",
+    "Number of trains delayed > 15min",
+    "Average delay of late trains at departure",
+    "Average delay of all trains at departure",
+    "Average delay of all trains at arrival",
+    "Pct delay due to external causes",
+    "Pct delay due to infrastructure",
+    "Pct delay due to traffic management",
+    "Pct delay due to rolling stock",
+    "Pct delay due to station management and equipment reuse",
+    "Pct delay due to passenger handling (crowding, disabled persons, connections)",
+)
+
+# Low-cardinality text columns, used as groupby keys and filters, are stored
+# as categories
+DTYPES = {
+    "Service": "category",
+    "Departure station": "category",
+    "Arrival station": "category",
+    "Route": "category",
+    "Season": "category",
+    "Delay_Category": "category",
+}
+
+
 # Load data and model functions
-@st.cache_data
+# Shared and never mutated, so skip cache_data's copy on every access
+@st.cache_resource
 def load_data():
     try:
-        df = pd.read_csv("cleaned_dataset.csv")
-        # Convert date column to datetime
+        # Only read the used columns the source actually has; the pages check
+        # for the optional ones themselves
+        if os.path.exists(PARQUET_PATH):
+            available = pq.read_schema(PARQUET_PATH).names
+            cols = [col for col in USED_COLS if col in available]
+            df = pd.read_parquet(PARQUET_PATH, columns=cols)
+        else:
+            available = pd.read_csv(DATA_PATH, nrows=0).columns
+            cols = [col for col in USED_COLS if col in available]
+            df = pd.read_csv(
+                DATA_PATH,
+                engine="pyarrow",
+                usecols=cols,
+                parse_dates=["Date"] if "Date" in cols else None,
+            )
+        # Cast whatever the source: groupbys and comparisons on these columns
+        # then run on integer codes
+        for col, dtype in DTYPES.items():
+            if col in df.columns:
+                df[col] = df[col].astype(dtype)
         if "Date" in df.columns:
-            df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+            # pyarrow leaves the column as text if any value fails to parse
+            if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+                df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+            # Integer year-month key (e.g. 201903) for cheap monthly groupbys
+            df["_ym"] = (df["Date"].dt.year * 100 + df["Date"].dt.month).astype("Int32")
         return df
     except Exception as e:
         st.error(f"Error loading data: {e}")
@@ -84,20 +173,416 @@ def load_data():
 
 @st.cache_resource
 def load_model():
+    # Also returns the pipeline's final estimator, used for feature importances
     try:
         with open("tardis_model.pkl", "rb") as f:
             model = pickle.load(f)
         with open("model_info.pkl", "rb") as f:
             model_info = pickle.load(f)
-        return model, model_info
+        return model, model.named_steps.get("model"), model_info
     except Exception as e:
         st.error(f"Error loading model: {e}")
-        return None, None
+        return None, None, None
+
+
+@st.cache_resource
+def load_aggregates():
+    # Skipped when missing or older than the dataset they were built from
+    paths = {
+        name: os.path.join(AGGREGATES_DIR, f"{name}.parquet")
+        for name in AGGREGATE_TABLES
+    }
+    source = PARQUET_PATH if os.path.exists(PARQUET_PATH) else DATA_PATH
+    if not os.path.exists(source) or not all(map(os.path.exists, paths.values())):
+        return {}
+    source_mtime = os.path.getmtime(source)
+    if any(os.path.getmtime(path) < source_mtime for path in paths.values()):
+        return {}
+    return {name: pd.read_parquet(path) for name, path in paths.items()}
+
+
+# Overview key metrics, reduced together in a single agg() call
+SUMMARY_AGGS = {
+    "Average delay of all trains at arrival": "mean",
+    "Number of cancelled trains": "sum",
+    "Number of trains delayed > 15min": "sum",
+    "Total_Delay_Score": "mean",
+}
+
+# Categorical model inputs with a dedicated widget on the prediction form
+FORM_CATEGORICAL = frozenset(
+    ("Service", "Departure station", "Arrival station", "Season")
+)
+
+# Upper bounds (minutes, inclusive) of each predicted delay category
+DELAY_THRESHOLDS = np.array([5, 15, 30])
+DELAY_CATEGORIES = ("Minimal", "Moderate", "Significant", "Severe")
+DELAY_COLOR_CLASSES = (
+    "delay-minimal",
+    "delay-moderate",
+    "delay-significant",
+    "delay-severe",
+)
+
+# Metric value formatters for the Route Statistics and station panels
+_fmt2 = "{:.2f} min".format
+_fmt1 = "{:.1f}".format
+_fmt0 = "{:.0f}".format
+
+# Per-route averages shown under Route Statistics on the Delay Prediction page
+STAT_COLS = (
+    "Average journey time",
+    "Number of scheduled trains",
+    "Number of cancelled trains",
+    "Average delay of all trains at departure",
+    "Average delay of all trains at arrival",
+)
+
+# Points kept per line trace; longer traces are LTTB-downsampled before being
+# sent to the browser
+N_SHOWN_SAMPLES = 2000
+
+
+def categorize(preds):
+    # Works on a single prediction or an array of them
+    idx = np.searchsorted(DELAY_THRESHOLDS, preds, side="left")
+    return np.asarray(DELAY_CATEGORIES)[idx], np.asarray(DELAY_COLOR_CLASSES)[idx]
+
+
+def month_start(ym):
+    # Inverse of the _ym key: 201903 -> 2019-03-01, built from the integer
+    # parts rather than by formatting and re-parsing a string per month
+    return pd.to_datetime(
+        pd.DataFrame({"year": ym // 100, "month": ym % 100, "day": 1})
+    )
+
+
+# Month bucket used by the DuckDB monthly aggregations
+MONTH_EXPR = "date_trunc('month', \"Date\")"
+
+
+@st.cache_resource
+def get_connection():
+    con = duckdb.connect()
+    con.execute(f"PRAGMA threads={os.cpu_count() or 1}")
+    has_view = os.path.exists(PARQUET_PATH)
+    if has_view:
+        con.execute(f"CREATE VIEW data AS SELECT * FROM read_parquet('{PARQUET_PATH}')")
+    return con, has_view
+
+
+def data_cursor():
+    # A cursor per query keeps the shared connection safe across sessions
+    con, has_view = get_connection()
+    cursor = con.cursor()
+    if not has_view:
+        # Without the Parquet file, scan the frame load_data() already holds
+        # instead of parsing the CSV again. A registered frame is only visible
+        # to the cursor it is registered on.
+        cursor.register("data", load_data())
+    return cursor
+
+
+def filter_clauses(start_date, end_date, station, service):
+    # SQL equivalent of the sidebar filters applied to filtered_df
+    clauses, params = [], []
+    if start_date is not None:
+        clauses.append('"Date" >= ? AND "Date" < ?')
+        params += [start_date, end_date + timedelta(days=1)]
+    if station != "All":
+        clauses.append('("Departure station" = ? OR "Arrival station" = ?)')
+        params += [station, station]
+    if service != "All":
+        clauses.append('"Service" = ?')
+        params.append(service)
+    return clauses, params
+
+
+@st.cache_data(max_entries=32)
+def grouped_mean(by, value_col, filters, by_expr=None):
+    # Mean of value_col per group over the filtered rows, computed in DuckDB
+    by_expr = by_expr or f'"{by}"'
+    clauses, params = filter_clauses(*filters)
+    clauses.append(f"{by_expr} IS NOT NULL")
+    sql = (
+        f'SELECT {by_expr} AS "{by}", AVG("{value_col}") AS "{value_col}" '
+        f"FROM data WHERE {' AND '.join(clauses)} GROUP BY 1 ORDER BY 1"
+    )
+    return data_cursor().execute(sql, params).df()
+
+
+def apply_filters(start_date, end_date, station, service):
+    # Callers treat filtered_df as read-only, so the frames are shared rather
+    # than copied per call
+    if start_date is None and station == "All" and service == "All":
+        return load_data()
+    return filter_rows(start_date, end_date, station, service)
+
+
+# cache_resource, not cache_data: a cache_data hit unpickles a full copy of
+# the frame, which costs more than recomputing the masks
+@st.cache_resource(max_entries=8)
+def filter_rows(start_date, end_date, station, service):
+    filtered_df = load_data()
+
+    if start_date is not None:
+        # Compare in datetime64 space rather than building a datetime.date per row
+        date_values = filtered_df["Date"].values
+        filtered_df = filtered_df[
+            (date_values >= np.datetime64(start_date))
+            & (date_values < np.datetime64(end_date) + np.timedelta64(1, "D"))
+        ]
+
+    if station != "All":
+        filtered_df = filtered_df[
+            (filtered_df["Departure station"] == station)
+            | (filtered_df["Arrival station"] == station)
+        ]
+
+    if service != "All":
+        filtered_df = filtered_df[filtered_df["Service"] == service]
+
+    return filtered_df
+
+
+@st.cache_data
+def delay_cause_cols(columns):
+    return tuple(col for col in columns if "Pct delay due to" in col)
+
+
+@st.cache_data(max_entries=32)
+def delay_cause_means(delay_cause_columns, filters):
+    # One column-wise reduction over a contiguous float32 block
+    values = apply_filters(*filters)[list(delay_cause_columns)].to_numpy(
+        dtype="float32"
+    )
+    with warnings.catch_warnings():
+        # All-NaN columns (e.g. no matching rows) give NaN, as in pandas
+        warnings.simplefilter("ignore", RuntimeWarning)
+        means = np.nanmean(values, axis=0)
+    return pd.DataFrame(
+        {
+            "Cause": [
+                col.replace("Pct delay due to ", "") for col in delay_cause_columns
+            ],
+            "Percentage": means,
+        }
+    )
+
+
+@st.cache_data(max_entries=32)
+def summary_metrics(filters):
+    filtered_df = apply_filters(*filters)
+    agg_map = {k: v for k, v in SUMMARY_AGGS.items() if k in filtered_df.columns}
+    return filtered_df.agg(agg_map).to_dict()
+
+
+@st.cache_data(max_entries=32)
+def delay_histogram(delay_col, filters, nbins=30):
+    # Bin in NumPy so only the bar heights are sent to the browser
+    values = apply_filters(*filters)[delay_col].to_numpy(
+        dtype="float32", na_value=np.nan
+    )
+    return np.histogram(values[~np.isnan(values)], bins=nbins)
+
+
+@st.cache_data(max_entries=32)
+def station_indices(colname, filters):
+    # Row positions per station so picking one is a gather, not a full scan
+    filtered_df = apply_filters(*filters)
+    return {
+        k: np.asarray(v, dtype=np.int64)
+        for k, v in filtered_df.groupby(colname, observed=True).indices.items()
+    }
+
+
+@st.cache_data
+def station_options():
+    # Station categories are already the distinct non-null names
+    df = load_data()
+    return np.union1d(
+        df["Departure station"].cat.categories, df["Arrival station"].cat.categories
+    ).tolist()
+
+
+@st.cache_data
+def category_options(col):
+    df = load_data()
+    return df[col].cat.categories.tolist()
+
+
+@st.cache_data(max_entries=32)
+def unique_sorted(col, filters):
+    values = apply_filters(*filters)[col]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Count codes instead of hashing strings; -1 marks missing values
+        codes = values.cat.codes.to_numpy()
+        categories = values.cat.categories
+        present = np.bincount(codes[codes >= 0], minlength=len(categories)) > 0
+        return tuple(sorted(categories[present]))
+    return tuple(sorted(values.dropna().unique()))
+
+
+@st.cache_data(max_entries=32)
+def build_route_index(filters):
+    # Departure station -> sorted arrival stations it connects to
+    edges = (
+        apply_filters(*filters)[["Departure station", "Arrival station"]]
+        .dropna()
+        .drop_duplicates()
+    )
+    arrivals = edges.groupby("Departure station", observed=True)[
+        "Arrival station"
+    ].apply(list)
+    return {dep: tuple(sorted(arr)) for dep, arr in arrivals.items()}
+
+
+@st.cache_data(max_entries=32)
+def route_stats(filters):
+    # Route Statistics and delay-factor slider defaults for every route
+    filtered_df = apply_filters(*filters)
+    cols = [col for col in STAT_COLS if col in filtered_df.columns]
+    cols += delay_cause_cols(tuple(filtered_df.columns))
+    return filtered_df.groupby(["Departure station", "Arrival station"], observed=True)[
+        cols
+    ].mean()
+
+
+@st.cache_data(max_entries=32)
+def feature_defaults(filters, num_cols, cat_cols):
+    # Fallbacks for model inputs the prediction form does not set
+    filtered_df = apply_filters(*filters)
+    defaults = dict.fromkeys(num_cols, 0) | dict.fromkeys(cat_cols, "")
+    num_cols = [col for col in num_cols if col in filtered_df.columns]
+    cat_cols = [col for col in cat_cols if col in filtered_df.columns]
+    defaults.update(filtered_df[num_cols].median().to_dict())
+    modes = filtered_df[cat_cols].mode()
+    if not modes.empty:
+        defaults.update(modes.iloc[0].to_dict())
+    return defaults
+
+
+@st.cache_data(max_entries=32)
+def build_prediction_context(filters, num_cols, cat_cols):
+    # Everything the Delay Prediction page derives from the filtered data
+    return SimpleNamespace(
+        route_index=build_route_index(filters),
+        stats=route_stats(filters),
+        defaults=feature_defaults(filters, num_cols, cat_cols),
+        delay_cols=delay_cause_cols(num_cols),
+    )
+
+
+@st.cache_resource
+def input_template(num_cols, cat_cols):
+    # One-row frame in training column order; copied and filled per prediction
+    return pd.DataFrame(
+        {col: np.array([np.nan]) for col in num_cols}
+        | {col: np.array([None], dtype=object) for col in cat_cols}
+    )
+
+
+@st.cache_data(max_entries=256)
+def predict_delay(_model, inputs):
+    # Keyed on the input row, so re-running a what-if scenario skips the model
+    return float(_model.predict(inputs)[0])
+
+
+def is_pipeline_of(step, *types):
+    return isinstance(step, Pipeline) and tuple(map(type, step[:])) == types
+
+
+@st.cache_resource
+def input_encoder(_model):
+    # Plain-array version of the notebook's preprocessor (median imputer and
+    # scaler for numbers, most-frequent imputer and one-hot for categories)
+    # so one prediction does not go through the ColumnTransformer. None when
+    # the pipeline is built differently.
+    transformers = getattr(_model[0], "transformers_", None)
+    if len(_model.steps) != 2 or transformers is None:
+        return None
+    used = [(n, t, c) for n, t, c in transformers if t != "drop"]
+    if [name for name, _, _ in used] != ["num", "cat"]:
+        return None
+    (_, num, num_cols), (_, cat, cat_cols) = used
+    if not is_pipeline_of(num, SimpleImputer, StandardScaler) or not is_pipeline_of(
+        cat, SimpleImputer, OneHotEncoder
+    ):
+        return None
+
+    imputer, scaler = num[0], num[1]
+    cat_imputer, onehot = cat[0], cat[1]
+    if (
+        imputer.strategy != "median"
+        or cat_imputer.strategy != "most_frequent"
+        or imputer.add_indicator
+        or cat_imputer.add_indicator
+        or pd.isna(imputer.statistics_).any()
+        or pd.isna(cat_imputer.statistics_).any()
+        or onehot.drop_idx_ is not None
+        or onehot.handle_unknown != "ignore"
+        or onehot.max_categories is not None
+        or onehot.min_frequency is not None
+    ):
+        return None
+
+    # Output column of each (feature, category) one-hot bit
+    offset = len(num_cols)
+    positions = []
+    for categories in onehot.categories_:
+        positions.append({value: offset + i for i, value in enumerate(categories)})
+        offset += len(categories)
+
+    return {
+        "num_cols": list(num_cols),
+        "num_fill": imputer.statistics_,
+        "mean": scaler.mean_ if scaler.with_mean else 0.0,
+        "scale": scaler.scale_ if scaler.with_std else 1.0,
+        "cat_cols": list(cat_cols),
+        "cat_fill": cat_imputer.statistics_,
+        "positions": positions,
+        "width": offset,
+    }
+
+
+def encode_inputs(encoder, input_data):
+    row = np.zeros(encoder["width"])
+    values = np.array([input_data.get(c) for c in encoder["num_cols"]], dtype=float)
+    values = np.where(np.isnan(values), encoder["num_fill"], values)
+    row[: len(values)] = (values - encoder["mean"]) / encoder["scale"]
+
+    # Unknown categories leave every bit at zero, as handle_unknown="ignore" does
+    for col, fill, positions in zip(
+        encoder["cat_cols"], encoder["cat_fill"], encoder["positions"]
+    ):
+        value = input_data.get(col)
+        if value != value:
+            value = fill
+        position = positions.get(value)
+        if position is not None:
+            row[position] = 1.0
+    return row.reshape(1, -1)
+
+
+@st.cache_resource
+def top_importances(_estimator, num_cols, cat_cols, k=5):
+    importances = _estimator.feature_importances_
+
+    # One-hot columns are not expanded back, so names past the original
+    # features are reported as Unknown
+    names = list(num_cols + cat_cols)[: len(importances)]
+    names += ["Unknown"] * (len(importances) - len(names))
+
+    # Partition out the top k, then sort only those
+    k = min(k, len(importances))
+    top = np.argpartition(importances, -k)[-k:]
+    top = top[np.argsort(importances[top])[::-1]]
+    return [(names[i], importances[i]) for i in top]
 
 
 # Load data and model
 df = load_data()
-model, model_info = load_model()
+model, estimator, model_info = load_model()
 
 if df is None:
     st.error("Failed to load the dataset. Please ensure 'cleaned_dataset.csv' exists.")
@@ -163,6 +648,9 @@ st.markdown(
 st.sidebar.markdown("---")
 st.sidebar.title("Filters")
 
+start_date = end_date = None
+selected_station = selected_service = "All"
+
 # Extract min and max dates from the dataset
 if "Date" in df.columns:
     min_date = df["Date"].min().date()
@@ -177,39 +665,20 @@ if "Date" in df.columns:
 
     if len(date_range) == 2:
         start_date, end_date = date_range
-        filtered_df = df[
-            (df["Date"].dt.date >= start_date) & (df["Date"].dt.date <= end_date)
-        ]
-    else:
-        filtered_df = df.copy()
-else:
-    filtered_df = df.copy()
 
 # Station filter
 if "Departure station" in df.columns and "Arrival station" in df.columns:
-    stations = sorted(
-        set(df["Departure station"].dropna().unique())
-        | set(df["Arrival station"].dropna().unique())
-    )
+    stations = station_options()
     selected_station = st.sidebar.selectbox("Filter by Station", ["All"] + stations)
 
-    if selected_station != "All":
-        filtered_df = filtered_df[
-            (filtered_df["Departure station"] == selected_station)
-            | (filtered_df["Arrival station"] == selected_station)
-        ]
-
 # Service filter
 if "Service" in df.columns:
-    services = sorted(df["Service"].dropna().unique())
+    services = category_options("Service")
     if len(services) > 1:  # Only show if there are multiple service types
         selected_service = st.sidebar.selectbox(
-            "Filter by Service Type", ["All"] + list(services)
+            "Filter by Service Type", ["All"] + services
         )
 
-        if selected_service != "All":
-            filtered_df = filtered_df[filtered_df["Service"] == selected_service]
-
 # Display selected filters
 st.sidebar.markdown("---")
 st.sidebar.write("**Displaying data for:**")
@@ -228,8 +697,26 @@ if (
 ):
     st.sidebar.write(f"- Service: {selected_service}")
 
-# Replace the Overview page section with this more detailed implementation
-if page == "Overview":
+# The filtered frame and the aggregations are cached on these values, so
+# reruns with unchanged filters skip recomputing them
+filters = (start_date, end_date, selected_station, selected_service)
+filtered_df = apply_filters(*filters)
+
+# When the filters select the full date range (which, like the tables, leaves
+# out rows without a date), the charts read the precomputed full-history
+# tables instead of aggregating
+unfiltered = (
+    start_date is not None
+    and (start_date, end_date) == (min_date, max_date)
+    and selected_station == "All"
+    and selected_service == "All"
+)
+aggregates = load_aggregates() if unfiltered else {}
+
+
+# Each page is rendered as a fragment, so its own widgets rerun only that page
+@st.fragment
+def render_overview(filtered_df, filters, aggregates):
     st.markdown(
         '<div class="sub-header">Overview Dashboard</div>', unsafe_allow_html=True
     )
@@ -240,11 +727,13 @@ if page == "Overview":
     # Summary metrics
     st.markdown('<div class="sub-header">Key Metrics</div>', unsafe_allow_html=True)
 
+    metrics = summary_metrics(filters)
+
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        avg_delay = filtered_df["Average delay of all trains at arrival"].mean()
+        avg_delay = metrics["Average delay of all trains at arrival"]
         st.markdown(
             f'<div class="metric-value">{avg_delay:.2f} min</div>',
             unsafe_allow_html=True,
@@ -256,8 +745,8 @@ if page == "Overview":
 
     with col2:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        if "Number of cancelled trains" in filtered_df.columns:
-            cancelled = filtered_df["Number of cancelled trains"].sum()
+        if "Number of cancelled trains" in metrics:
+            cancelled = metrics["Number of cancelled trains"]
             st.markdown(
                 f'<div class="metric-value">{int(cancelled)}</div>',
                 unsafe_allow_html=True,
@@ -276,8 +765,8 @@ if page == "Overview":
 
     with col3:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        if "Number of trains delayed > 15min" in filtered_df.columns:
-            significant_delays = filtered_df["Number of trains delayed > 15min"].sum()
+        if "Number of trains delayed > 15min" in metrics:
+            significant_delays = metrics["Number of trains delayed > 15min"]
             st.markdown(
                 f'<div class="metric-value">{int(significant_delays)}</div>',
                 unsafe_allow_html=True,
@@ -296,8 +785,8 @@ if page == "Overview":
 
     with col4:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        if "Total_Delay_Score" in filtered_df.columns:
-            avg_delay_score = filtered_df["Total_Delay_Score"].mean()
+        if "Total_Delay_Score" in metrics:
+            avg_delay_score = metrics["Total_Delay_Score"]
             st.markdown(
                 f'<div class="metric-value">{avg_delay_score:.2f}%</div>',
                 unsafe_allow_html=True,
@@ -320,27 +809,28 @@ if page == "Overview":
     )
 
     if "Date" in filtered_df.columns:
-        monthly_data = (
-            filtered_df.groupby(pd.Grouper(key="Date", freq="M"))[
-                "Average delay of all trains at arrival"
-            ]
-            .mean()
-            .reset_index()
-        )
-        monthly_data["Month"] = monthly_data["Date"].dt.strftime("%Y-%m")
+        monthly_data = aggregates.get("monthly_avg")
+        if monthly_data is None:
+            monthly_data = grouped_mean(
+                "Date",
+                "Average delay of all trains at arrival",
+                filters,
+                by_expr=MONTH_EXPR,
+            )
 
-        fig = px.line(
-            monthly_data,
-            x="Month",
-            y="Average delay of all trains at arrival",
+        fig = FigureResampler(default_n_shown_samples=N_SHOWN_SAMPLES)
+        fig.add_trace(
+            go.Scattergl(mode="lines+markers"),
+            hf_x=monthly_data["Date"].to_numpy(),
+            hf_y=monthly_data["Average delay of all trains at arrival"].to_numpy(),
+        )
+        fig.update_layout(
             title="Average Delay by Month",
-            labels={
-                "Average delay of all trains at arrival": "Average Delay (minutes)",
-                "Month": "Month",
-            },
-            markers=True,
+            xaxis_title="Month",
+            yaxis_title="Average Delay (minutes)",
+            height=400,
+            xaxis_hoverformat="%Y-%m",
         )
-        fig.update_layout(height=400)
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("Date information is not available in the dataset")
@@ -348,30 +838,33 @@ if page == "Overview":
     # Delay causes breakdown
     st.markdown('<div class="sub-header">Delay Causes</div>', unsafe_allow_html=True)
 
-    delay_cause_columns = [
-        col for col in filtered_df.columns if "Pct delay due to" in col
-    ]
+    delay_cause_columns = delay_cause_cols(tuple(filtered_df.columns))
     if delay_cause_columns:
-        avg_delay_causes = filtered_df[delay_cause_columns].mean().reset_index()
-        avg_delay_causes.columns = ["Cause", "Percentage"]
-        avg_delay_causes["Cause"] = avg_delay_causes["Cause"].str.replace(
-            "Pct delay due to ", ""
+        avg_delay_causes = aggregates.get("delay_causes")
+        if avg_delay_causes is None:
+            avg_delay_causes = delay_cause_means(delay_cause_columns, filters)
+
+        fig = go.Figure(
+            go.Bar(
+                x=avg_delay_causes["Percentage"].to_numpy(),
+                y=avg_delay_causes["Cause"].to_numpy(),
+                orientation="h",
+            )
         )
-
-        fig = px.bar(
-            avg_delay_causes,
-            y="Cause",
-            x="Percentage",
+        fig.update_layout(
             title="Average Percentage of Delays by Cause",
-            labels={"Percentage": "Percentage (%)", "Cause": "Cause"},
-            orientation="h",
+            xaxis_title="Percentage (%)",
+            yaxis_title="Cause",
+            height=400,
+            yaxis={"categoryorder": "total ascending"},
         )
-        fig.update_layout(height=400, yaxis={"categoryorder": "total ascending"})
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("Delay cause information is not available in the dataset")
 
-elif page == "Delay Analysis":
+
+@st.fragment
+def render_delay_analysis(filtered_df, filters):
     st.markdown('<div class="sub-header">Delay Analysis</div>', unsafe_allow_html=True)
     st.write("Explore detailed patterns and distributions of train delays.")
 
@@ -382,14 +875,17 @@ elif page == "Delay Analysis":
 
     delay_col = "Average delay of all trains at arrival"
     if delay_col in filtered_df.columns:
-        fig = px.histogram(
-            filtered_df,
-            x=delay_col,
+        counts, edges = delay_histogram(delay_col, filters)
+        fig = go.Figure(
+            go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges))
+        )
+        fig.update_layout(
             title="Distribution of Delays",
-            labels={delay_col: "Delay (minutes)"},
-            nbins=30,
+            xaxis_title="Delay (minutes)",
+            yaxis_title="count",
+            bargap=0,
+            height=400,
         )
-        fig.update_layout(height=400)
         st.plotly_chart(fig, use_container_width=True)
 
         # Descriptive statistics
@@ -454,7 +950,7 @@ elif page == "Delay Analysis":
                 unsafe_allow_html=True,
             )
 
-            season_data = filtered_df.groupby("Season")[delay_col].mean().reset_index()
+            season_data = grouped_mean("Season", delay_col, filters)
             season_order = ["Winter", "Spring", "Summer", "Fall"]
             season_data["Season"] = pd.Categorical(
                 season_data["Season"], categories=season_order, ordered=True
@@ -480,9 +976,11 @@ elif page == "Delay Analysis":
             unsafe_allow_html=True,
         )
 
-        delay_category_counts = (
-            filtered_df["Delay_Category"].value_counts().reset_index()
-        )
+        # Categorical value_counts lists every category; keep the ones present
+        delay_category_counts = filtered_df["Delay_Category"].value_counts()
+        delay_category_counts = delay_category_counts[
+            delay_category_counts > 0
+        ].reset_index()
         delay_category_counts.columns = ["Category", "Count"]
 
         # Order the categories
@@ -516,12 +1014,9 @@ elif page == "Delay Analysis":
         fig.update_layout(height=400)
         st.plotly_chart(fig, use_container_width=True)
 
-elif page == "Station Insights":
-    st.markdown(
-        '<div class="sub-header">Station Insights</div>', unsafe_allow_html=True
-    )
-    st.write("Analyze delay patterns by stations.")
 
+@st.fragment
+def render_top_stations(filtered_df, filters, aggregates):
     if (
         "Departure station" in filtered_df.columns
         and "Average delay of all trains at departure" in filtered_df.columns
@@ -532,29 +1027,29 @@ elif page == "Station Insights":
             unsafe_allow_html=True,
         )
 
-        station_delays = (
-            filtered_df.groupby("Departure station")[
-                "Average delay of all trains at departure"
-            ]
-            .mean()
-            .reset_index()
+        station_delays = aggregates.get("station_dep_top")
+        if station_delays is None:
+            station_delays = grouped_mean(
+                "Departure station", "Average delay of all trains at departure", filters
+            )
+            station_delays = station_delays.nlargest(
+                15, "Average delay of all trains at departure"
+            )
+
+        fig = go.Figure(
+            go.Bar(
+                x=station_delays["Average delay of all trains at departure"].to_numpy(),
+                y=station_delays["Departure station"].to_numpy(),
+                orientation="h",
+            )
         )
-        station_delays = station_delays.sort_values(
-            "Average delay of all trains at departure", ascending=False
-        ).head(15)
-
-        fig = px.bar(
-            station_delays,
-            x="Average delay of all trains at departure",
-            y="Departure station",
+        fig.update_layout(
             title="Top 15 Departure Stations with Highest Average Delays",
-            labels={
-                "Average delay of all trains at departure": "Average Delay (minutes)",
-                "Departure station": "Station",
-            },
-            orientation="h",
+            xaxis_title="Average Delay (minutes)",
+            yaxis_title="Station",
+            height=600,
+            yaxis={"categoryorder": "total ascending"},
         )
-        fig.update_layout(height=600, yaxis={"categoryorder": "total ascending"})
         st.plotly_chart(fig, use_container_width=True)
 
     if (
@@ -567,31 +1062,35 @@ elif page == "Station Insights":
             unsafe_allow_html=True,
         )
 
-        station_delays = (
-            filtered_df.groupby("Arrival station")[
-                "Average delay of all trains at arrival"
-            ]
-            .mean()
-            .reset_index()
+        station_delays = aggregates.get("station_arr_top")
+        if station_delays is None:
+            station_delays = grouped_mean(
+                "Arrival station", "Average delay of all trains at arrival", filters
+            )
+            station_delays = station_delays.nlargest(
+                15, "Average delay of all trains at arrival"
+            )
+
+        fig = go.Figure(
+            go.Bar(
+                x=station_delays["Average delay of all trains at arrival"].to_numpy(),
+                y=station_delays["Arrival station"].to_numpy(),
+                orientation="h",
+            )
         )
-        station_delays = station_delays.sort_values(
-            "Average delay of all trains at arrival", ascending=False
-        ).head(15)
-
-        fig = px.bar(
-            station_delays,
-            x="Average delay of all trains at arrival",
-            y="Arrival station",
+        fig.update_layout(
             title="Top 15 Arrival Stations with Highest Average Delays",
-            labels={
-                "Average delay of all trains at arrival": "Average Delay (minutes)",
-                "Arrival station": "Station",
-            },
-            orientation="h",
+            xaxis_title="Average Delay (minutes)",
+            yaxis_title="Station",
+            height=600,
+            yaxis={"categoryorder": "total ascending"},
         )
-        fig.update_layout(height=600, yaxis={"categoryorder": "total ascending"})
         st.plotly_chart(fig, use_container_width=True)
 
+
+# Separate from the top-N charts so picking a station does not redraw them
+@st.fragment
+def render_station_analysis(filtered_df, filters):
     # Station specific analysis
     st.markdown(
         '<div class="sub-header">Station-Specific Analysis</div>',
@@ -613,13 +1112,22 @@ elif page == "Station Insights":
         )
 
         # Filter data for selected station
+        no_rows = np.empty(0, dtype=np.int64)
         station_data_departure = (
-            filtered_df[filtered_df["Departure station"] == selected_analysis_station]
+            filtered_df.iloc[
+                station_indices("Departure station", filters).get(
+                    selected_analysis_station, no_rows
+                )
+            ]
             if "Departure station" in filtered_df.columns
             else pd.DataFrame()
         )
         station_data_arrival = (
-            filtered_df[filtered_df["Arrival station"] == selected_analysis_station]
+            filtered_df.iloc[
+                station_indices("Arrival station", filters).get(
+                    selected_analysis_station, no_rows
+                )
+            ]
             if "Arrival station" in filtered_df.columns
             else pd.DataFrame()
         )
@@ -635,32 +1143,41 @@ elif page == "Station Insights":
             ):
                 st.metric(
                     "Average Departure Delay",
-                    f"{station_data_departure['Average delay of all trains at departure'].mean():.2f} min",
+                    _fmt2(
+                        station_data_departure[
+                            "Average delay of all trains at departure"
+                        ].mean()
+                    ),
                 )
 
                 if "Date" in station_data_departure.columns:
                     monthly_station_data = (
-                        station_data_departure.groupby(
-                            pd.Grouper(key="Date", freq="M")
-                        )["Average delay of all trains at departure"]
+                        station_data_departure.groupby("_ym", sort=True)[
+                            "Average delay of all trains at departure"
+                        ]
                         .mean()
                         .reset_index()
                     )
-                    monthly_station_data["Month"] = monthly_station_data[
-                        "Date"
-                    ].dt.strftime("%Y-%m")
-
-                    fig = px.line(
-                        monthly_station_data,
-                        x="Month",
-                        y="Average delay of all trains at departure",
-                        title=f"Monthly Departure Delays from {selected_analysis_station}",
-                        labels={
-                            "Average delay of all trains at departure": "Avg Delay (min)",
-                            "Month": "Month",
-                        },
-                        markers=True,
+                    monthly_station_data["Date"] = month_start(
+                        monthly_station_data["_ym"]
                     )
+
+                    fig = FigureResampler(
+                        px.line(
+                            monthly_station_data,
+                            x="Date",
+                            y="Average delay of all trains at departure",
+                            title=f"Monthly Departure Delays from {selected_analysis_station}",
+                            labels={
+                                "Average delay of all trains at departure": "Avg Delay (min)",
+                                "Date": "Month",
+                            },
+                            markers=True,
+                            render_mode="webgl",
+                        ),
+                        default_n_shown_samples=N_SHOWN_SAMPLES,
+                    )
+                    fig.update_layout(xaxis_hoverformat="%Y-%m")
                     st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info(
@@ -676,32 +1193,41 @@ elif page == "Station Insights":
             ):
                 st.metric(
                     "Average Arrival Delay",
-                    f"{station_data_arrival['Average delay of all trains at arrival'].mean():.2f} min",
+                    _fmt2(
+                        station_data_arrival[
+                            "Average delay of all trains at arrival"
+                        ].mean()
+                    ),
                 )
 
                 if "Date" in station_data_arrival.columns:
                     monthly_station_data = (
-                        station_data_arrival.groupby(pd.Grouper(key="Date", freq="M"))[
+                        station_data_arrival.groupby("_ym", sort=True)[
                             "Average delay of all trains at arrival"
                         ]
                         .mean()
                         .reset_index()
                     )
-                    monthly_station_data["Month"] = monthly_station_data[
-                        "Date"
-                    ].dt.strftime("%Y-%m")
-
-                    fig = px.line(
-                        monthly_station_data,
-                        x="Month",
-                        y="Average delay of all trains at arrival",
-                        title=f"Monthly Arrival Delays at {selected_analysis_station}",
-                        labels={
-                            "Average delay of all trains at arrival": "Avg Delay (min)",
-                            "Month": "Month",
-                        },
-                        markers=True,
+                    monthly_station_data["Date"] = month_start(
+                        monthly_station_data["_ym"]
                     )
+
+                    fig = FigureResampler(
+                        px.line(
+                            monthly_station_data,
+                            x="Date",
+                            y="Average delay of all trains at arrival",
+                            title=f"Monthly Arrival Delays at {selected_analysis_station}",
+                            labels={
+                                "Average delay of all trains at arrival": "Avg Delay (min)",
+                                "Date": "Month",
+                            },
+                            markers=True,
+                            render_mode="webgl",
+                        ),
+                        default_n_shown_samples=N_SHOWN_SAMPLES,
+                    )
+                    fig.update_layout(xaxis_hoverformat="%Y-%m")
                     st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info(
@@ -710,7 +1236,19 @@ elif page == "Station Insights":
     else:
         st.info("Station information is not available in the dataset")
 
-elif page == "Route Analysis":
+
+def render_station_insights(filtered_df, filters, aggregates):
+    st.markdown(
+        '<div class="sub-header">Station Insights</div>', unsafe_allow_html=True
+    )
+    st.write("Analyze delay patterns by stations.")
+
+    render_top_stations(filtered_df, filters, aggregates)
+    render_station_analysis(filtered_df, filters)
+
+
+@st.fragment
+def render_route_analysis(filtered_df, filters, aggregates):
     st.markdown('<div class="sub-header">Route Analysis</div>', unsafe_allow_html=True)
     st.write("Analyze delay patterns by routes.")
 
@@ -724,27 +1262,29 @@ elif page == "Route Analysis":
             unsafe_allow_html=True,
         )
 
-        route_delays = (
-            filtered_df.groupby("Route")["Average delay of all trains at arrival"]
-            .mean()
-            .reset_index()
+        route_delays = aggregates.get("route_top")
+        if route_delays is None:
+            route_delays = grouped_mean(
+                "Route", "Average delay of all trains at arrival", filters
+            )
+            route_delays = route_delays.nlargest(
+                15, "Average delay of all trains at arrival"
+            )
+
+        fig = go.Figure(
+            go.Bar(
+                x=route_delays["Average delay of all trains at arrival"].to_numpy(),
+                y=route_delays["Route"].to_numpy(),
+                orientation="h",
+            )
         )
-        route_delays = route_delays.sort_values(
-            "Average delay of all trains at arrival", ascending=False
-        ).head(15)
-
-        fig = px.bar(
-            route_delays,
-            x="Average delay of all trains at arrival",
-            y="Route",
+        fig.update_layout(
             title="Top 15 Routes with Highest Average Delays",
-            labels={
-                "Average delay of all trains at arrival": "Average Delay (minutes)",
-                "Route": "Route",
-            },
-            orientation="h",
+            xaxis_title="Average Delay (minutes)",
+            yaxis_title="Route",
+            height=600,
+            yaxis={"categoryorder": "total ascending"},
         )
-        fig.update_layout(height=600, yaxis={"categoryorder": "total ascending"})
         st.plotly_chart(fig, use_container_width=True)
 
         # Route comparison tool
@@ -752,8 +1292,8 @@ elif page == "Route Analysis":
             '<div class="sub-header">Route Comparison</div>', unsafe_allow_html=True
         )
 
-        # Get all routes
-        all_routes = sorted(filtered_df["Route"].dropna().unique())
+        # Get all routes (from the full dataset, the selection is filtered below)
+        all_routes = category_options("Route")
 
         # Let user select routes to compare
         selected_routes = st.multiselect(
@@ -766,7 +1306,9 @@ elif page == "Route Analysis":
 
             # Average delay by route
             route_avg_delays = (
-                routes_data.groupby("Route")["Average delay of all trains at arrival"]
+                routes_data.groupby("Route", observed=True)[
+                    "Average delay of all trains at arrival"
+                ]
                 .mean()
                 .reset_index()
             )
@@ -789,41 +1331,46 @@ elif page == "Route Analysis":
                 st.markdown("**Monthly Delay Trends by Route**")
 
                 monthly_route_data = (
-                    routes_data.groupby(["Route", pd.Grouper(key="Date", freq="M")])[
+                    routes_data.groupby(["Route", "_ym"], sort=True, observed=True)[
                         "Average delay of all trains at arrival"
                     ]
                     .mean()
                     .reset_index()
                 )
-                monthly_route_data["Month"] = monthly_route_data["Date"].dt.strftime(
-                    "%Y-%m"
-                )
-
-                fig = px.line(
-                    monthly_route_data,
-                    x="Month",
-                    y="Average delay of all trains at arrival",
-                    color="Route",
+                monthly_route_data["Date"] = month_start(monthly_route_data["_ym"])
+
+                # One trace per route so each is downsampled independently
+                fig = FigureResampler(default_n_shown_samples=N_SHOWN_SAMPLES)
+                for route, route_monthly in monthly_route_data.groupby(
+                    "Route", observed=True
+                ):
+                    fig.add_trace(
+                        go.Scattergl(name=route, mode="lines+markers"),
+                        hf_x=route_monthly["Date"].to_numpy(),
+                        hf_y=route_monthly[
+                            "Average delay of all trains at arrival"
+                        ].to_numpy(),
+                    )
+                fig.update_layout(
                     title="Monthly Delay Trends by Route",
-                    labels={
-                        "Average delay of all trains at arrival": "Average Delay (minutes)",
-                        "Month": "Month",
-                    },
-                    markers=True,
+                    xaxis_title="Month",
+                    yaxis_title="Average Delay (minutes)",
+                    legend_title_text="Route",
+                    height=500,
+                    xaxis_hoverformat="%Y-%m",
                 )
-                fig.update_layout(height=500)
                 st.plotly_chart(fig, use_container_width=True)
 
             # Show delay cause breakdown by route if available
-            delay_cause_columns = [
-                col for col in filtered_df.columns if "Pct delay due to" in col
-            ]
+            delay_cause_columns = delay_cause_cols(tuple(filtered_df.columns))
             if delay_cause_columns:
                 st.markdown("**Delay Causes by Route**")
 
                 # Calculate average percentages for each cause by route
                 route_causes = (
-                    routes_data.groupby("Route")[delay_cause_columns]
+                    routes_data.groupby("Route", observed=True)[
+                        list(delay_cause_columns)
+                    ]
                     .mean()
                     .reset_index()
                 )
@@ -851,7 +1398,10 @@ elif page == "Route Analysis":
                 )
                 fig.update_layout(height=500)
                 st.plotly_chart(fig, use_container_width=True)
-elif page == "Delay Prediction":
+
+
+@st.fragment
+def render_delay_prediction(filtered_df, filters):
     st.markdown(
         '<div class="sub-header">Delay Prediction</div>', unsafe_allow_html=True
     )
@@ -906,125 +1456,101 @@ elif page == "Delay Prediction":
         # Input data dictionary to store all prediction parameters
         input_data = {}
 
+        # Sets for the membership tests below
+        categorical_features = set(model_info["categorical_features"])
+        columns = frozenset(filtered_df.columns)
+
+        num_cols = tuple(model_info["numerical_features"])
+        cat_cols = tuple(model_info["categorical_features"])
+        ctx = build_prediction_context(filters, num_cols, cat_cols)
+
         with col1:
             # Service Type
-            if "Service" in model_info["categorical_features"]:
-                services = sorted(filtered_df["Service"].dropna().unique())
+            if "Service" in categorical_features:
+                services = unique_sorted("Service", filters)
                 selected_service = st.selectbox("Service Type", services)
                 input_data["Service"] = selected_service
 
             # Departure Station
-            departure_stations = sorted(
-                filtered_df["Departure station"].dropna().unique()
-            )
+            departure_stations = unique_sorted("Departure station", filters)
             selected_departure = st.selectbox("Departure Station", departure_stations)
             input_data["Departure station"] = selected_departure
 
             # Find valid arrival stations based on departure station selection
-            valid_arrival_stations = (
-                filtered_df[filtered_df["Departure station"] == selected_departure][
-                    "Arrival station"
-                ]
-                .dropna()
-                .unique()
-            )
+            valid_arrival_stations = ctx.route_index.get(selected_departure, ())
 
             if len(valid_arrival_stations) == 0:
                 st.warning(
                     f"No connections found from {selected_departure}. Please select another departure station."
                 )
-                valid_arrival_stations = sorted(
-                    filtered_df["Arrival station"].dropna().unique()
-                )
-            else:
-                valid_arrival_stations = sorted(valid_arrival_stations)
+                valid_arrival_stations = unique_sorted("Arrival station", filters)
 
             # Arrival Station
             selected_arrival = st.selectbox("Arrival Station", valid_arrival_stations)
             input_data["Arrival station"] = selected_arrival
 
             # Season
-            if "Season" in model_info["categorical_features"]:
+            if "Season" in categorical_features:
                 seasons = ["Winter", "Spring", "Summer", "Fall"]
                 selected_season = st.selectbox("Season", seasons)
                 input_data["Season"] = selected_season
 
             # Add any other categorical features that might be in the model
             for feature in model_info["categorical_features"]:
-                if feature not in [
-                    "Service",
-                    "Departure station",
-                    "Arrival station",
-                    "Season",
-                ]:
-                    unique_values = sorted(filtered_df[feature].dropna().unique())
+                if feature not in FORM_CATEGORICAL:
+                    unique_values = unique_sorted(feature, filters)
                     input_data[feature] = st.selectbox(feature, unique_values)
 
-        # After selecting stations, get the route-specific data
-        route_data = filtered_df[
-            (filtered_df["Departure station"] == selected_departure)
-            & (filtered_df["Arrival station"] == selected_arrival)
-        ]
-
         with col2:
             st.markdown("**Route Statistics**")
 
-            if not route_data.empty:
-                # Display automatic route statistics and use these values for prediction
-                avg_journey_time = route_data["Average journey time"].mean()
-                st.metric("Average Journey Time", f"{avg_journey_time:.2f} min")
-                input_data["Average journey time"] = avg_journey_time
-
-                if "Number of scheduled trains" in route_data.columns:
-                    avg_scheduled = route_data["Number of scheduled trains"].mean()
-                    st.metric("Avg. Scheduled Trains", f"{avg_scheduled:.0f}")
-                    input_data["Number of scheduled trains"] = avg_scheduled
-
-                if "Number of cancelled trains" in route_data.columns:
-                    avg_cancelled = route_data["Number of cancelled trains"].mean()
-                    st.metric("Avg. Cancelled Trains", f"{avg_cancelled:.1f}")
-                    input_data["Number of cancelled trains"] = avg_cancelled
-
-                if "Average delay of all trains at departure" in route_data.columns:
-                    avg_departure_delay = route_data[
-                        "Average delay of all trains at departure"
-                    ].mean()
-                    st.metric("Avg. Departure Delay", f"{avg_departure_delay:.2f} min")
-                    input_data["Average delay of all trains at departure"] = (
-                        avg_departure_delay
+            # Averages for the selected route, or for the whole filtered
+            # dataset when the route has no history
+            try:
+                stats = ctx.stats.loc[(selected_departure, selected_arrival)]
+                is_route = True
+            except KeyError:
+                stats = filtered_df.reindex(columns=ctx.stats.columns).mean()
+                is_route = False
+
+            if is_route:
+                # Display automatic route statistics
+                st.metric("Average Journey Time", _fmt2(stats["Average journey time"]))
+
+                if "Number of scheduled trains" in columns:
+                    st.metric(
+                        "Avg. Scheduled Trains",
+                        _fmt0(stats["Number of scheduled trains"]),
+                    )
+
+                if "Number of cancelled trains" in columns:
+                    st.metric(
+                        "Avg. Cancelled Trains",
+                        _fmt1(stats["Number of cancelled trains"]),
+                    )
+
+                if "Average delay of all trains at departure" in columns:
+                    st.metric(
+                        "Avg. Departure Delay",
+                        _fmt2(stats["Average delay of all trains at departure"]),
                     )
 
                 # Historical arrival delay (for reference, not used in prediction)
-                if "Average delay of all trains at arrival" in route_data.columns:
-                    avg_arrival_delay = route_data[
-                        "Average delay of all trains at arrival"
-                    ].mean()
+                if "Average delay of all trains at arrival" in columns:
                     st.metric(
-                        "Historical Arrival Delay", f"{avg_arrival_delay:.2f} min"
+                        "Historical Arrival Delay",
+                        _fmt2(stats["Average delay of all trains at arrival"]),
                     )
             else:
                 st.warning(
                     f"No historical data for route: {selected_departure} to {selected_arrival}"
                 )
-                # Use dataset averages as fallbacks
-                input_data["Average journey time"] = filtered_df[
-                    "Average journey time"
-                ].mean()
-
-                if "Number of scheduled trains" in filtered_df.columns:
-                    input_data["Number of scheduled trains"] = filtered_df[
-                        "Number of scheduled trains"
-                    ].mean()
-
-                if "Number of cancelled trains" in filtered_df.columns:
-                    input_data["Number of cancelled trains"] = filtered_df[
-                        "Number of cancelled trains"
-                    ].mean()
-
-                if "Average delay of all trains at departure" in filtered_df.columns:
-                    input_data["Average delay of all trains at departure"] = (
-                        filtered_df["Average delay of all trains at departure"].mean()
-                    )
+
+            # Use these values for prediction (the arrival delay is the target,
+            # so it is left out)
+            for col in STAT_COLS[:-1]:
+                if col in columns:
+                    input_data[col] = stats[col]
 
             # Add current date-related features
             today = datetime.now()
@@ -1033,54 +1559,42 @@ elif page == "Delay Prediction":
 
             # External delay cause factors (if in the model)
             st.markdown("**Delay Factors (%)**")
-            delay_cause_columns = [
-                col
-                for col in model_info["numerical_features"]
-                if "Pct delay due to" in col
-            ]
-
-            # Use historical averages from the selected route if available
-            for col in delay_cause_columns:
-                # Extract the main part of the cause for display
-                display_name = col.replace("Pct delay due to ", "")
 
-                if not route_data.empty and col in route_data.columns:
-                    default_value = route_data[col].mean()
-                else:
-                    default_value = (
-                        filtered_df[col].mean() if col in filtered_df.columns else 10.0
+            # In a form so dragging a slider does not rerun the page
+            with st.form("predict"):
+                for col in ctx.delay_cols:
+                    # Extract the main part of the cause for display
+                    display_name = col.replace("Pct delay due to ", "")
+                    # Historical average from the selected route if available
+                    default_value = stats.get(col, 10.0)
+
+                    # Make the sliders editable by users for custom scenarios
+                    input_data[col] = st.slider(
+                        display_name, 0.0, 100.0, float(default_value)
                     )
 
-                # Make the sliders editable by users for custom scenarios
-                input_data[col] = st.slider(
-                    display_name, 0.0, 100.0, float(default_value)
-                )
+                # Make prediction button
+                submitted = st.form_submit_button("Predict Delay")
 
-        # Make prediction button
-        if st.button("Predict Delay"):
+        if submitted:
             try:
                 # Ensure all required features are available
-                for feature in model_info["numerical_features"]:
-                    if feature not in input_data:
-                        input_data[feature] = (
-                            filtered_df[feature].median()
-                            if feature in filtered_df.columns
-                            else 0
-                        )
-
-                for feature in model_info["categorical_features"]:
-                    if feature not in input_data:
-                        input_data[feature] = (
-                            filtered_df[feature].mode()[0]
-                            if feature in filtered_df.columns
-                            else ""
-                        )
-
-                # Create DataFrame with a single row for prediction
-                input_df = pd.DataFrame([input_data])
+                for feature, value in ctx.defaults.items():
+                    input_data.setdefault(feature, value)
 
                 # Make prediction
-                prediction = model.predict(input_df)[0]
+                encoder = input_encoder(model)
+                if encoder is not None:
+                    prediction = predict_delay(
+                        estimator, encode_inputs(encoder, input_data)
+                    )
+                else:
+                    # Fill a copy of the single-row template for the pipeline
+                    input_df = input_template(num_cols, cat_cols).copy()
+                    for feature, value in input_data.items():
+                        if feature in input_df.columns:
+                            input_df.iat[0, input_df.columns.get_loc(feature)] = value
+                    prediction = predict_delay(model, input_df)
 
                 # Display result
                 st.markdown(
@@ -1089,18 +1603,7 @@ elif page == "Delay Prediction":
                 )
 
                 # Determine delay category
-                if prediction <= 5:
-                    delay_category = "Minimal"
-                    color_class = "delay-minimal"
-                elif prediction <= 15:
-                    delay_category = "Moderate"
-                    color_class = "delay-moderate"
-                elif prediction <= 30:
-                    delay_category = "Significant"
-                    color_class = "delay-significant"
-                else:
-                    delay_category = "Severe"
-                    color_class = "delay-severe"
+                delay_category, color_class = categorize(prediction)
 
                 st.markdown(
                     f"""
@@ -1113,9 +1616,6 @@ elif page == "Delay Prediction":
                     unsafe_allow_html=True,
                 )
 
-                # Add contextual information
-                route = f"{selected_departure} to {selected_arrival}"
-
                 # Explanation of factors
                 st.markdown(
                     '<div class="sub-header">Contributing Factors</div>',
@@ -1123,44 +1623,12 @@ elif page == "Delay Prediction":
                 )
 
                 # If we're using a tree-based model that has feature importances
-                if hasattr(model.named_steps["model"], "feature_importances_"):
-                    # Get feature importances
-                    importances = model.named_steps["model"].feature_importances_
-
-                    # Get feature names after preprocessing (if available)
-                    feature_names = []
-
-                    # Get numeric feature names (these stay the same)
-                    feature_names.extend(model_info["numerical_features"])
-
-                    # For categorical features, we would need the one-hot encoded feature names
-                    # But since this is complex to recreate here, we'll use the original feature names
-                    feature_names.extend(model_info["categorical_features"])
-
-                    # Create a dataframe of features and their importances
-                    feature_importance = pd.DataFrame(
-                        {
-                            "Feature": feature_names[: len(importances)]
-                            if len(feature_names) >= len(importances)
-                            else feature_names
-                            + ["Unknown"] * (len(importances) - len(feature_names)),
-                            "Importance": importances,
-                        }
-                    )
-
-                    # Sort by importance
-                    feature_importance = feature_importance.sort_values(
-                        "Importance", ascending=False
-                    ).head(5)
-
+                if hasattr(estimator, "feature_importances_"):
                     # Display
                     st.write("Top factors influencing delays:")
 
                     for i, (feature, importance) in enumerate(
-                        zip(
-                            feature_importance["Feature"],
-                            feature_importance["Importance"],
-                        )
+                        top_importances(estimator, num_cols, cat_cols)
                     ):
                         st.write(f"{i + 1}. **{feature}**: {importance:.2%}")
                 else:
@@ -1178,3 +1646,15 @@ elif page == "Delay Prediction":
             except Exception as e:
                 st.error(f"Error making prediction: {str(e)}")
                 st.write("Please check your input values and try again.")
+
+
+if page == "Overview":
+    render_overview(filtered_df, filters, aggregates)
+elif page == "Delay Analysis":
+    render_delay_analysis(filtered_df, filters)
+elif page == "Station Insights":
+    render_station_insights(filtered_df, filters, aggregates)
+elif page == "Route Analysis":
+    render_route_analysis(filtered_df, filters, aggregates)
+elif page == "Delay Prediction":
+    render_delay_prediction(filtered_df, filters)